@@ -1,60 +1,115 @@
-import os
-import time
-import requests
-import pandas as pd
 import numpy as np
 import streamlit as st
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
 from datetime import datetime, timedelta, timezone
 
+st.set_page_config(page_title="Gringotts v14.0", layout="wide")
+
 # ===================== 0. 环境底座与时间门禁 (v11保留) =====================
 TZ_CHINA = timezone(timedelta(hours=8))
+HIST_LEN = 100  # 价格/量历史环形缓冲长度
 
 def is_trade_time():
     """审计当前是否为 A 股合法交易时段"""
     now = datetime.now(TZ_CHINA)
     if now.weekday() >= 5:
         return False, "😴 非交易日 (休息中)"
-    curr_time = now.strftime("%H:%M:%S")
-    if ("09:15:00" <= curr_time <= "11:30:30") or ("13:00:00" <= curr_time <= "15:02:00"):
+    # 当日秒数比较，免去 strftime 字符串分配: 09:15:00~11:30:30 / 13:00:00~15:02:00
+    t = now.hour * 3600 + now.minute * 60 + now.second
+    if (33300 <= t <= 41430) or (46800 <= t <= 54120):
         return True, "⚡ 审计内核运行中"
     return False, "🌙 非交易时段 (已挂起)"
 
+# 每次脚本运行只审计一次；自动刷新片段内仍逐拍复核以便收盘时退出
+TRADING, TRADE_MSG = is_trade_time()
+
+@dataclass
+class KernelState:
+    """审计内核逐拍状态 - 整体挂在 session_state['kstate'] 一个键下，逐拍原地改属性"""
+    price_history: np.ndarray = field(default_factory=lambda: np.empty(HIST_LEN))
+    imb_history: np.ndarray = field(default_factory=lambda: np.empty(HIST_LEN))
+    hist_head: int = 0
+    hist_len: int = 0
+    vwap_v_sum: float = 0.0
+    vwap_pv_sum: float = 0.0
+    vwap_ema: Optional[float] = None
+    ema1: Optional[float] = None
+    ema2: Optional[float] = None
+    cvd_history: list = field(default_factory=list)
+    cvd: float = 0.0
+
 def init_vault(target_code):
-    if "current_code" not in st.session_state or st.session_state.current_code != target_code:
-        st.session_state.current_code = target_code
-        st.session_state.price_history = []
-        st.session_state.imb_history = []
-        st.session_state.cvd_history = []
-        st.session_state.cvd = 0.0
+    ss = st.session_state
+    if ss.get("current_code") != target_code:
+        ss.current_code = target_code
+        ss.kstate = KernelState()
+        ss.last_tick_key, ss.last_view, ss.last_tick_at = None, None, None
         st.toast(f"🏛️ v12.8 全量功能内核挂载: {target_code}")
 
-def safe_float(x, default=0.0):
-    try: return float(str(x).replace(',', ''))
-    except: return default
+def push_history(ks, price, vol):
+    """写入环形缓冲 - 预分配定长数组，每拍只做一次下标写入，无列表切片与重分配"""
+    i = ks.hist_head
+    pb, vb = ks.price_history, ks.imb_history
+    # 同步维护窗口内的量 / 价×量累计，窗口已满时先扣除即将被覆盖的最旧样本
+    if ks.hist_len == HIST_LEN:
+        ks.vwap_v_sum -= vb[i]
+        ks.vwap_pv_sum -= pb[i] * vb[i]
+    pb[i], vb[i] = price, vol
+    ks.vwap_v_sum += vol
+    ks.vwap_pv_sum += price * vol
+    ks.hist_head = (i + 1) % HIST_LEN
+    ks.hist_len = min(ks.hist_len + 1, HIST_LEN)
 
 # ===================== 1. 高阶数理工具箱 (v14.0 增强版) =====================
-def calculate_zema(data, period=10):
-    """Zero Lag Exponential Moving Average - 消除量化常见的均线滞后"""
-    ema1 = pd.Series(data).ewm(span=period, adjust=False).mean()
-    ema2 = ema1.ewm(span=period, adjust=False).mean()
-    return (ema1 + (ema1 - ema2)).iloc[-1]
-
-def calculate_zvwap(prices, volumes):
-    """Zero Lag VWAP - 判定机构真实的持仓成本重心"""
-    prices, volumes = np.array(prices), np.array(volumes)
-    typical_p = prices 
-    v_cum = volumes.cumsum()
-    pv_cum = (typical_p * volumes).cumsum()
-    vwap = pv_cum / (v_cum + 1e-9)
-    # 引入零滞后修正
-    vwap_ema = pd.Series(vwap).ewm(span=10).mean()
-    return (vwap * 2 - vwap_ema).iloc[-1]
-
-def get_market_sentiment(quote):
-    """提取基础情绪指标：量比、换手率"""
-    v_ratio = safe_float(quote.get('量比', 1.0))
-    turnover = safe_float(quote.get('换手率', 0.0))
-    return v_ratio, turnover
+def ewma_step(s, x, alpha):
+    """单步 EMA 递推 - ZEMA 与 ZVWAP 共用，首拍 (s 为 None) 以当前值起步"""
+    return x if s is None else s + alpha * (x - s)
+
+def update_zema(ks, x, period=10):
+    """Zero Lag Exponential Moving Average - 消除量化常见的均线滞后 (双 EMA 标量递推，O(1))"""
+    alpha = 2.0 / (period + 1)
+    ks.ema1 = ewma_step(ks.ema1, x, alpha)
+    ks.ema2 = ewma_step(ks.ema2, ks.ema1, alpha)
+    return ks.ema1 + (ks.ema1 - ks.ema2)
+
+def update_zvwap(ks, span=10):
+    """Zero Lag VWAP - 判定机构真实的持仓成本重心 (窗口累计由 push_history 增量维护，O(1))"""
+    vwap = ks.vwap_pv_sum / (ks.vwap_v_sum + 1e-9)
+    # 引入零滞后修正：VWAP 的 EMA 逐拍递推
+    ks.vwap_ema = ewma_step(ks.vwap_ema, vwap, 2.0 / (span + 1))
+    return vwap * 2 - ks.vwap_ema
+
+class BookFeatures(NamedTuple):
+    bid_sum: float    # 买盘总量 (股)
+    ask_sum: float    # 卖盘总量 (股)
+    weicha: float     # 委差
+    weibi: float      # 委比 (%)
+    bid_depth: float  # 承接厚度 (¥)
+    ask_depth: float  # 压制厚度 (¥)
+    bid_min: float    # 买盘最低挂价
+    ask_max: float    # 卖盘最高挂价
+    bid_last: float   # 买5 价
+    ask_last: float   # 卖5 价
+
+def orderbook_features(bid_p, bid_v, ask_p, ask_v):
+    """五档盘口标量特征一次成型 - 先整体转成 Python float，再按定长 5 手工展开，
+    总量/委差/委比/厚度/极值共用一次调用，不再逐项分派 NumPy 归约"""
+    bp, bv, ap, av = bid_p.tolist(), bid_v.tolist(), ask_p.tolist(), ask_v.tolist()
+    bid_sum = bv[0] + bv[1] + bv[2] + bv[3] + bv[4]
+    ask_sum = av[0] + av[1] + av[2] + av[3] + av[4]
+    weicha = bid_sum - ask_sum
+    return BookFeatures(
+        bid_sum, ask_sum, weicha, (weicha / (bid_sum + ask_sum + 1e-9)) * 100,
+        bv[0]*bp[0] + bv[1]*bp[1] + bv[2]*bp[2] + bv[3]*bp[3] + bv[4]*bp[4],
+        av[0]*ap[0] + av[1]*ap[1] + av[2]*ap[2] + av[3]*ap[3] + av[4]*ap[4],
+        min(bp), max(ap), bp[4], ap[4],
+    )
+
+def audit_side(v, avg_v, side):
+    """五档挂单意图标签 - 布尔掩码一次判完整侧，替代逐档调用判定函数"""
+    big = "🛑 拦截大单" if side == 'ask' else "🛡️ 强力托单"
+    return np.where(v > avg_v * 3, big, np.where(v < avg_v * 0.2, "🪶 微量探测", "稳定")).tolist()
 
 # ===================== UI 侧边栏交互补全 =====================
 with st.sidebar:
@@ -62,88 +117,127 @@ with st.sidebar:
     target_code = st.text_input("代码", value="601898")
     total_capital = st.number_input("总投放金额 (CNY)", value=100000)
     refresh_rate = st.slider("审计刷新频率 (秒)", 1, 10, 3)
+    watch_raw = st.text_input("观察列表", value="", help="逗号分隔，与主代码同一次请求批量拉取")
+    watchlist = [c.strip() for c in watch_raw.split(',') if c.strip() and c.strip() != target_code]
     init_vault(target_code)
-    st.info(f"审计状态: {is_trade_time()[1]}")
+    st.info(f"审计状态: {TRADE_MSG}")
     if st.button("RESET"): st.session_state.clear(); st.rerun()
 # --- 补在此处 ---
-def fetch_data(code):
-    try:
-        pre = "sh" if code.startswith('6') else "sz"
-        # 实时请求腾讯接口
-        r = requests.get(f"http://qt.gtimg.cn/q={pre}{code}", timeout=1.5)
-        p = r.text.split('~')
-        # 核心：必须抓取完整的五档挂单数据
-        return {
-            '最新价': p[3], '成交量': p[6], '量比': p[45] if len(p)>45 else 1.0,
-            '买盘': pd.DataFrame([{'价格':p[9+i*2], '数量':p[10+i*2]} for i in range(5)]),
-            '卖盘': pd.DataFrame([{'价格':p[19+i*2], '数量':p[20+i*2]} for i in range(5)])
-        }
-    except: return None
+_HTTP_TIMEOUT = (0.5, 1.0)  # (建连, 读取) 秒
+_BOOK_FMT = {'价格': '{:.2f}'.format, '数量': '{:.0f}'.format}
+_WATCH_FMT = {'最新价': '{:.2f}'.format, '成交量': '{:.0f}'.format, '量比': '{:.2f}'.format}
+
+def _html_table(df, fmt):
+    """五行小表直出静态 HTML - 绕开 st.table 的 Arrow 序列化与表格组件"""
+    return df.to_html(index=False, formatters=fmt, border=0)
+
+@st.cache_resource
+def _sess():
+    """跨 rerun 复用的 HTTP 会话 - keep-alive 免去每次轮询的 TCP/DNS 握手"""
+    import requests  # 仅交易时段建会话时才需要，且 cache_resource 保证每进程只走一次
+    from requests.adapters import HTTPAdapter
+    s = requests.Session()
+    s.headers["Connection"] = "keep-alive"
+    # 只连 qt.gtimg.cn 一个主机，小连接池足够；多会话并发时最多复用 4 条
+    s.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+    return s
+
+_BAD = frozenset(('', '-', '--', 'None'))  # 行情空档位占位符
+
+def _tq(x):
+    """腾讯行情数值字段 - 空档位占位符 (见 _BAD) 直接记 0，其余本就是无千分位的纯数字"""
+    return 0.0 if x in _BAD else float(x)
+
+def _vratio(p):
+    """量比 (字段 49) 仅供观察列表展示 - 单独兜底为 1.0，脏值不连累整行行情"""
+    try: return float(p[49])
+    except (IndexError, ValueError): return 1.0
+
+@st.cache_data(ttl=1, show_spinner=False)
+def _fetch_raw_batch(codes):
+    """批量拉取并解析腾讯行情 - 一次请求覆盖全部代码，只返回原始值，TTL 内跨会话共用"""
+    q = ','.join(f"{'sh' if c.startswith('6') else 'sz'}{c}" for c in codes)
+    # 实时请求腾讯接口 (复用长连接)，每只代码一行: v_sh601898="1~名称~601898~...";
+    r = _sess().get(f"http://qt.gtimg.cn/q={q}", timeout=_HTTP_TIMEOUT)
+    out = {}
+    for line in r.text.splitlines():
+        p = line.split('~')
+        try:
+            # 核心：必须抓取完整的五档挂单数据 - 买1~5 价/量 (9~18) + 卖1~5 价/量 (19~28) 一次解析
+            book = np.fromiter(map(_tq, p[9:29]), dtype=np.float64, count=20)
+            book[1::2] *= 100  # 挂单量: 手 → 股，解析时一次换算，内核直接使用
+            out[p[2]] = (_tq(p[3]), _tq(p[6]), _vratio(p), book)
+        except (IndexError, ValueError): continue  # 无效代码 / 残缺行 - 只有盘口、现价、成交量能判废一行
+    return out
+
+@dataclass
+class Quote:
+    """单只代码的一拍行情 - 五档保持为一块 float64 缓冲，盘口表格只在渲染时组装"""
+    last: float
+    vol: float
+    v_ratio: float
+    book: np.ndarray  # 买1~5 价/量 + 卖1~5 价/量，交错排列，量以股计
+
+    @property
+    def bid_p(self): return self.book[0:10:2]
+    @property
+    def bid_v(self): return self.book[1:10:2]
+    @property
+    def ask_p(self): return self.book[10:20:2]
+    @property
+    def ask_v(self): return self.book[11:20:2]
+
+def fetch_data_batch(codes):
+    try: raw = _fetch_raw_batch(tuple(codes))
+    except: return {}
+    return {code: Quote(*fields) for code, fields in raw.items()}
 # --- 补在此处结束 ---
 # ===================== 2. 核心审计内核 (高阶逻辑) =====================
-def institutional_kernel(quote, df_bids, df_asks):
-    # 2.1 基础盘口数据提取
-    curr_p = safe_float(quote['最新价'])
-    bid_v, ask_v = df_bids['数量'].apply(safe_float).values * 100, df_asks['数量'].apply(safe_float).values * 100
-    bid_p, ask_p = df_bids['价格'].apply(safe_float).values, df_asks['价格'].apply(safe_float).values
+def institutional_kernel(q):
+    ks = st.session_state.kstate  # 本地绑定，全部内核状态都挂在这一个对象上
+    # 2.1 基础盘口数据提取 (fetch 层已解析为 float 数组，量已换算为股)
+    curr_p = q.last
+    bid_v, ask_v = q.bid_v, q.ask_v
     
-    # 2.2 委比 & 委差 (实时意图：衡量量化对冲压制力)
-    total_bid_v, total_ask_v = bid_v.sum(), ask_v.sum()
-    weicha = total_bid_v - total_ask_v  # 委差
-    weibi = (weicha / (total_bid_v + total_ask_v + 1e-9)) * 100 # 委比
+    # 2.2 委比 & 委差 (实时意图：衡量量化对冲压制力) + 盘口厚度，一次算出全部五档特征
+    f = orderbook_features(q.bid_p, bid_v, q.ask_p, ask_v)
+    total_bid_v, total_ask_v, weicha, weibi = f.bid_sum, f.ask_sum, f.weicha, f.weibi
     
     # 2.3 ZEMA & ZVWAP 动态基准
-    zema = calculate_zema(st.session_state.price_history)
-    zvwap = calculate_zvwap(st.session_state.price_history, st.session_state.imb_history) # 模拟量加权
+    zema = update_zema(ks, curr_p)
+    zvwap = update_zvwap(ks) # 模拟量加权
     
     # 2.4 极端价格预测 (情绪动态模型)
     # 最抄底价：基于 ZVWAP 的负偏离 + 委比支撑
-    p_floor = min(bid_p) * (1 - (abs(weibi)/1000)) if weibi < -20 else bid_p[-1]
+    p_floor = f.bid_min * (1 - (abs(weibi)/1000)) if weibi < -20 else f.bid_last
     # 极度获利位：基于 ZEMA 的正偏离 + CVD 动量
-    cvd_t = st.session_state.cvd_history[-1] if st.session_state.cvd_history else 0
-    p_peak = max(ask_p) * (1 + (cvd_t/1e8)) if cvd_t > 0 else ask_p[-1]
-
-    # 2.5 买入/卖出评分时机 (Trader Logic)
-    b_score = 0
-    if curr_p <= zvwap and weibi > 10: b_score += 50  # 价格在重心下方且买盘占优
-    if cvd_t > 0 and zema > curr_p: b_score += 50    # 动量反转触发
-    
-    s_score = 0
-    if curr_p >= zema and weibi < -10: s_score += 50 # 价格超涨且卖盘拦截
-    if total_ask_v > total_bid_v * 1.5: s_score += 50 # 极端拦截压制
+    cvd_hist = ks.cvd_history
+    cvd_t = cvd_hist[-1] if cvd_hist else 0
+    p_peak = f.ask_max * (1 + (cvd_t/1e8)) if cvd_t > 0 else f.ask_last
 
     # 2.5 盘口厚度与意图审计 (核心：穿透量化挂单)
-    avg_bid_v, avg_ask_v = np.mean(bid_v), np.mean(ask_v)
-    
-    def get_intent(v, avg_v, side):
-        if v > avg_v * 3: return "🛑 拦截大单" if side=='ask' else "🛡️ 强力托单"
-        if v < avg_v * 0.2: return "🪶 微量探测"
-        return "稳定"
+    avg_bid_v, avg_ask_v = total_bid_v / 5, total_ask_v / 5
 
     # 生成意图标签
-    ask_intents = [get_intent(v, avg_ask_v, 'ask') for v in ask_v]
-    bid_intents = [get_intent(v, avg_bid_v, 'bid') for v in bid_v]
-    
-    # 盘口厚度 (Total Depth Amount)
-    bid_depth = np.sum(bid_v * bid_p)
-    ask_depth = np.sum(ask_v * ask_p)
+    ask_intents = audit_side(ask_v, avg_ask_v, 'ask')
+    bid_intents = audit_side(bid_v, avg_bid_v, 'bid')
 
-    # 2.5 买入/卖出评分与原因审计 (补全逻辑)
+    # 2.5 买入/卖出评分与原因审计 (Trader Logic)
     b_score = 0
     b_reasons = []
-    if curr_p <= zvwap and weibi > 10: 
+    if curr_p <= zvwap and weibi > 10:  # 价格在重心下方且买盘占优
         b_score += 50
         b_reasons.append("⚖️ 低于重心+强力托单")
-    if cvd_t > 0 and zema > curr_p: 
+    if cvd_t > 0 and zema > curr_p:  # 动量反转触发
         b_score += 50
         b_reasons.append("🔄 动量翻红+ZEMA支撑")
     
     s_score = 0
     s_reasons = []
-    if curr_p >= zema and weibi < -10: 
+    if curr_p >= zema and weibi < -10:  # 价格超涨且卖盘拦截
         s_score += 50
         s_reasons.append("🛑 压力拦截+委比较差")
-    if total_ask_v > total_bid_v * 1.5: 
+    if total_ask_v > total_bid_v * 1.5:  # 极端拦截压制
         s_score += 50
         s_reasons.append("🔥 极端压制")
 
@@ -154,73 +248,90 @@ def institutional_kernel(quote, df_bids, df_asks):
     return {
         "p_floor": p_floor, "p_peak": p_peak, "zvwap": zvwap, "zema": zema,
         "weibi": weibi, "weicha": weicha, "b_score": b_score, "s_score": s_score,
-        "curr_p": curr_p, "bid_depth": bid_depth, "ask_depth": ask_depth,
+        "curr_p": curr_p, "bid_depth": f.bid_depth, "ask_depth": f.ask_depth,
         "ask_intents": ask_intents, "bid_intents": bid_intents,
         "b_msg": b_msg, "s_msg": s_msg  # <--- 必须补齐这两行
     }
 # ===================== 3. 执行引擎 (核心驱动) =====================
-st.set_page_config(page_title="Gringotts v14.0", layout="wide")
+def book_tables(res, q):
+    """盘口两表只在真实跳动时组装一次 HTML - 静默拍直接重发字符串，不再过 pandas"""
+    import pandas as pd  # 延迟到交易时段首拍再加载；之后走 sys.modules 缓存
+    # 只在这里按列组装，卖盘自上而下为卖5→卖1，数量仍按手展示
+    df_a = pd.DataFrame({'价格': q.ask_p[::-1], '数量': q.ask_v[::-1] / 100, '意图审计': res['ask_intents'][::-1]})
+    df_b = pd.DataFrame({'价格': q.bid_p, '数量': q.bid_v / 100, '意图审计': res['bid_intents']})
+    return _html_table(df_a, _BOOK_FMT), _html_table(df_b, _BOOK_FMT)
+
+def render_panel(res, ask_html, bid_html):
+    # 1. 计算获利潜能与视觉标记
+    profit_space = (res['p_peak'] / res['curr_p'] - 1) * 100
+    space_color = "🟢" if profit_space > 0 else "🔴"
+
+    # 2. 增强型标题显示
+    st.subheader(f"📊 当前价格: ¥{res['curr_p']:.2f} | {space_color} 获利空间: {profit_space:.2f}%")
+    # 3. 第一排核心指标：价格与极端位
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("最低吸入位", f"¥{res['p_floor']:.2f}", "抄底点", delta_color="normal")
+    c2.metric("最高获利位", f"¥{res['p_peak']:.2f}", "止盈点", delta_color="inverse")
+    c3.metric("机构成本 (ZVWAP)", f"¥{res['zvwap']:.2f}")
+    c4.metric("委比 / 委差", f"{res['weibi']:.1f}%", f"{int(res['weicha'])}")
+    st.divider()
+
+    # 第二排：买入原因 / 卖出原因
+    l, r = st.columns(2)
+    with l:
+        st.write(f"🌲 **买入评分: {res['b_score']} / 100** | 承接厚度: ¥{res['bid_depth']:,.0f}")
+        st.progress(res['b_score']/100)
+        st.success(f"审计线索: {res['b_msg']}")
+    with r:
+        st.write(f"🔥 **卖出评分: {res['s_score']} / 100** | 压制厚度: ¥{res['ask_depth']:,.0f}")
+        st.progress(res['s_score']/100)
+        st.warning(f"审计线索: {res['s_msg']}")
+
+    st.write(f"🛡️ **ZEMA 基准:** ¥{res['zema']:.2f} | **当前获利空间:** {profit_space:.2f}%")
+
+    # --- 修正后的意图审计细节表格 (HTML 已由 book_tables 在真实跳动时生成) ---
+    with st.expander("👁️ 盘口意图与挂单审计", expanded=True):
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.write("卖方盘口 (Ask)")
+            st.markdown(ask_html, unsafe_allow_html=True)
+        with col_b:
+            st.write("买方盘口 (Bid)")
+            st.markdown(bid_html, unsafe_allow_html=True)
+
+def render_watch(quotes, codes):
+    import pandas as pd
+    rows = [{'代码': c, '最新价': quotes[c].last, '成交量': quotes[c].vol, '量比': quotes[c].v_ratio}
+            for c in codes if c in quotes]
+    if rows:
+        st.markdown(_html_table(pd.DataFrame(rows), _WATCH_FMT), unsafe_allow_html=True)
+
+@st.fragment(run_every=refresh_rate)
+def audit_panel(target_code, watchlist):
+    """自动刷新只重跑本片段 - 侧边栏与页面配置每个会话只在控件变动时执行"""
+    if not is_trade_time()[0]:
+        st.rerun()  # 交易时段结束，整页切回挂起态
+    ss = st.session_state
+    quotes = fetch_data_batch([target_code, *watchlist])
+    q = quotes.get(target_code)
+    if q:
+        # 0. 静默盘口：价/量/五档均未跳动时跳过入史与内核，直接重绘上一拍结果
+        tick_key = (q.last, q.vol, q.book.tobytes())
+        if tick_key != ss.last_tick_key:
+            ss.last_tick_key, ss.last_tick_at = tick_key, datetime.now(TZ_CHINA)
+            # 1. 压入价格历史用于 ZEMA 计算，成交量模拟 IMB 历史用于 ZVWAP 权重
+            push_history(ss.kstate, q.last, q.vol)
+
+            # 2. 运行审计内核，盘口表格 HTML 随结果一并缓存
+            res = institutional_kernel(q)
+            ss.last_view = (res, *book_tables(res, q))
+    elif ss.last_view:
+        st.warning(f"⚠️ 行情拉取失败，以下为 {ss.last_tick_at:%H:%M:%S} 的最后一拍")
+    if ss.last_view:
+        render_panel(*ss.last_view)
+    render_watch(quotes, watchlist)
 
-if is_trade_time()[0]:
-    data = fetch_data(target_code)
-    if data:
-        # 1. 压入价格历史用于 ZEMA 计算
-        st.session_state.price_history.append(safe_float(data['最新价']))
-        st.session_state.price_history = st.session_state.price_history[-100:]
-        # 模拟 IMB 历史用于 ZVWAP 权重
-        st.session_state.imb_history.append(safe_float(data['成交量']))
-        st.session_state.imb_history = st.session_state.imb_history[-100:]
-        
-        # 2. 运行审计内核
-        res = institutional_kernel(data, data['买盘'], data['卖盘'])
-        
-        # 第一排：价格与极端位 (高亮显示)
-        # 1. 计算获利潜能与视觉标记
-        profit_space = (res['p_peak'] / res['curr_p'] - 1) * 100
-        space_color = "🟢" if profit_space > 0 else "🔴"
-        
-        # 2. 增强型标题显示
-        st.subheader(f"📊 当前价格: ¥{res['curr_p']} | {space_color} 获利空间: {profit_space:.2f}%")
-        # 3. 第一排核心指标
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric("最低吸入位", f"¥{res['p_floor']:.2f}", "抄底点", delta_color="normal")
-        c2.metric("最高获利位", f"¥{res['p_peak']:.2f}", "止盈点", delta_color="inverse")
-        c3.metric("机构成本 (ZVWAP)", f"¥{res['zvwap']:.2f}")
-        c4.metric("委比 / 委差", f"{res['weibi']:.1f}%", f"{int(res['weicha'])}")
-        
-        st.divider()
-
-        # 第二排：双向评分与厚度显示
-        l, r = st.columns(2)
-        with l:
-            st.write(f"🌲 **买入评分: {res['b_score']} / 100** | 承接厚度: ¥{res['bid_depth']:,.0f}")
-            st.progress(res['b_score']/100)
-            # 这里是你要的买入原因
-            st.success(f"审计线索: {res['b_msg']}") 
-            
-        with r:
-            st.write(f"🔥 **卖出评分: {res['s_score']} / 100** | 压制厚度: ¥{res['ask_depth']:,.0f}")
-            st.progress(res['s_score']/100)
-            # 这里是卖出原因
-            st.warning(f"审计线索: {res['s_msg']}")
-
-        st.write(f"🛡️ **ZEMA 基准:** ¥{res['zema']:.2f} | **当前获利空间:** {((res['p_peak']/res['curr_p']-1)*100):.2f}%")
-# --- 修正后的意图审计细节表格 ---
-        with st.expander("👁️ 盘口意图与挂单审计", expanded=True):
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.write("卖方盘口 (Ask)")
-                df_a = data['卖盘'].iloc[::-1].copy()
-                # 确保 kernel 返回了 ask_intents
-                df_a['意图审计'] = res['ask_intents'][::-1]
-                st.table(df_a)
-            with col_b:
-                st.write("买方盘口 (Bid)")
-                df_b = data['买盘'].copy()
-                # 确保 kernel 返回了 bid_intents
-                df_b['意图审计'] = res['bid_intents']
-                st.table(df_b)
-    time.sleep(refresh_rate)
-    st.rerun()
+if TRADING:
+    audit_panel(target_code, watchlist)
 else:
-    st.warning(f"🚨 内核挂起: {is_trade_time()[1]}")
+    st.warning(f"🚨 内核挂起: {TRADE_MSG}")